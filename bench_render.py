@@ -0,0 +1,57 @@
+# Render keshi uchun mikrobenchmark: python bench_render.py
+# handlers dagi haqiqiy render funksiyalari DB so'rovlarisiz (stub ma'lumot bilan) o'lchanadi:
+# har bir update uchun qayta qurish va keshdan olish CPU vaqti solishtiriladi.
+import asyncio
+import os
+import time
+
+os.environ.setdefault("BOT_TOKEN", "1:bench")
+os.environ.setdefault("LOG_FILE", os.devnull)
+
+import handlers
+from db import Film
+from render_cache import get, get_or_render
+
+N = 20_000
+
+top_rows = [(f"code{i}", f"Film nomi {i}", 1000 - i) for i in range(20)]
+page_films = [Film(code=f"code{i}", title=f"Film nomi {i}") for i in range(30)]
+
+async def stub_top_films(limit: int = 20):
+    return top_rows
+
+async def stub_list_films_paginated(offset: int, limit: int):
+    return page_films
+
+async def stub_films_count() -> int:
+    return len(page_films)
+
+handlers.top_films = stub_top_films
+handlers.list_films_paginated = stub_list_films_paginated
+handlers.films_count = stub_films_count
+
+async def per_call(fn) -> float:
+    start = time.perf_counter()
+    for _ in range(N):
+        await fn()
+    return (time.perf_counter() - start) / N
+
+async def run(name, key, kinds, build):
+    await get_or_render(key, kinds, build)
+    cold = await per_call(build)
+    warm = await per_call(lambda: get_or_render(key, kinds, build))
+    print(f"{name:<10} qayta qurish: {cold * 1e6:7.2f} us  kesh: {warm * 1e6:5.2f} us  "
+          f"tejaldi: {(cold - warm) * 1e6:7.2f} us/update")
+
+async def main():
+    await run("top_films", "top_films", ("catalog", "stats"), handlers.render_top_films)
+    await run("film_page", ("film_page", 0), ("catalog",), lambda: handlers.render_film_page(0))
+    # Markup JSON ga aiogram yuborish paytida aylantiradi, bu qism keshlanmaydi
+    markup = get(("film_page", 0)).reply_markup
+    start = time.perf_counter()
+    for _ in range(N):
+        markup.model_dump_json(exclude_none=True)
+    print(f"markup JSON (har yuborishda): {(time.perf_counter() - start) / N * 1e6:.2f} us")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -2,20 +2,19 @@ import logging
 import asyncio
 from fastapi import FastAPI, Request, HTTPException
 from aiogram import Bot, Dispatcher
-from aiogram.enums import ParseMode
 from aiogram.types import Update
 
 from config import get_settings
 from logger import setup_logging
 from db import init_db
 from handlers import user_router, admin_router
+from bots import session, all_bots, webhook_path, webhook_url, webhook_secret
 
 # Konfiguratsiya va loglarni sozlash
 settings = get_settings()
 setup_logging(settings.LOG_FILE)
 
-# Bot va dispatcher
-bot = Bot(token=settings.BOT_TOKEN, parse_mode=ParseMode.HTML)
+# Barcha botlar uchun bitta dispatcher
 dp = Dispatcher()
 dp.include_router(user_router)
 dp.include_router(admin_router)
@@ -26,32 +25,33 @@ app = FastAPI()
 @app.on_event("startup")
 async def on_startup():
     # Bazani yaratish
-    await init_db()
-    # Webhookni sozlash
-    await bot.set_webhook(
-        url=settings.WEBHOOK_URL,
-        secret_token=settings.WEBHOOK_SECRET,
-        drop_pending_updates=True,
-        allowed_updates=["message", "callback_query"]
-    )
-    logging.info("Webhook set. Server started.")
+    await init_db(all_bots[0].id)
+    # Har bir bot uchun webhookni sozlash
+    for bot in all_bots:
+        await bot.set_webhook(
+            url=webhook_url(bot),
+            secret_token=webhook_secret(bot),
+            drop_pending_updates=True,
+            allowed_updates=["message", "callback_query"]
+        )
+    logging.info(f"Webhook set for {len(all_bots)} bot(s). Server started.")
 
 @app.on_event("shutdown")
 async def on_shutdown():
-    try:
-        # Webhookni o‘chirish
-        await bot.delete_webhook(drop_pending_updates=False)
-    except Exception as e:
-        logging.warning(f"Webhook delete failed: {e}")
-    # Aiogram sessionini yopish
-    await bot.session.close()
+    for bot in all_bots:
+        try:
+            # Webhookni o‘chirish
+            await bot.delete_webhook(drop_pending_updates=False)
+        except Exception as e:
+            logging.warning(f"Webhook delete failed for {bot.id}: {e}")
+    # Umumiy aiogram sessionini yopish
+    await session.close()
     logging.info("Server stopped.")
 
-@app.post("/webhook")
-async def telegram_webhook(request: Request):
+async def feed(request: Request, bot: Bot):
     # Secret tokenni tekshirish
     secret = request.headers.get("X-Telegram-Bot-Api-Secret-Token")
-    if secret != settings.WEBHOOK_SECRET:
+    if secret != webhook_secret(bot):
         raise HTTPException(status_code=403, detail="Forbidden")
 
     data = await request.json()
@@ -59,6 +59,15 @@ async def telegram_webhook(request: Request):
     await dp.feed_update(bot, update)
     return {"ok": True}
 
+def make_webhook(bot: Bot):
+    async def telegram_webhook(request: Request):
+        return await feed(request, bot)
+    return telegram_webhook
+
+# Har bir bot uchun alohida webhook yo'li
+for _bot in all_bots:
+    app.add_api_route(webhook_path(_bot), make_webhook(_bot), methods=["POST"])
+
 # Render health-check uchun root endpoint
 @app.get("/")
 @app.head("/")
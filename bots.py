@@ -0,0 +1,60 @@
+import hashlib
+from typing import Dict, List, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.enums import ParseMode
+
+from config import get_settings
+
+settings = get_settings()
+
+# Barcha botlar uchun bitta HTTP session (ulanishlar puli umumiy)
+session = AiohttpSession()
+
+# Asosiy bot va mirror botlar
+bot = Bot(token=settings.BOT_TOKEN, session=session, parse_mode=ParseMode.HTML)
+mirror_bots = [Bot(token=t, session=session, parse_mode=ParseMode.HTML) for t in settings.MIRROR_BOT_TOKENS]
+all_bots: List[Bot] = [bot, *mirror_bots]
+
+def webhook_path(b: Bot) -> str:
+    # Asosiy bot eski "/webhook" manzilida qoladi
+    if b is bot:
+        return "/webhook"
+    return f"/webhook/{b.id}"
+
+def webhook_url(b: Bot) -> str:
+    # Asosiy bot WEBHOOK_URL ni o'zgarishsiz ishlatadi,
+    # mirror bot uchun yo'l oxiriga "/<bot_id>" qo'shiladi (webhook_path bilan bir xil)
+    if b is bot:
+        return settings.WEBHOOK_URL
+    url = urlsplit(settings.WEBHOOK_URL)
+    return urlunsplit(url._replace(path=f"{url.path.rstrip('/')}/{b.id}"))
+
+def webhook_secret(b: Bot) -> str:
+    if b is bot:
+        return settings.WEBHOOK_SECRET
+    # Mirror bot uchun tokendan hosil qilingan alohida secret
+    return hashlib.sha256(f"{settings.WEBHOOK_SECRET}:{b.token}".encode()).hexdigest()
+
+def can_reach(b: Bot, bot_ids: List[int]) -> bool:
+    # Ro'yxati bo'sh (eski) foydalanuvchilar faqat asosiy botda /start bosgan
+    if not bot_ids:
+        return b is bot
+    return b.id in bot_ids
+
+def spread(targets: Dict[int, List[int]]) -> Tuple[Dict[Bot, List[int]], int]:
+    # targets: {tg_id: [foydalanuvchi /start bosgan bot_id lar]}
+    # Har bir foydalanuvchi eng kam yuklangan botga biriktiriladi.
+    # Qaytaradi: (navbatlar, hech bir bot yeta olmaydigan foydalanuvchilar soni)
+    queues: Dict[Bot, List[int]] = {b: [] for b in all_bots}
+    skipped = 0
+    for uid, bot_ids in targets.items():
+        candidates = [b for b in all_bots if can_reach(b, bot_ids)]
+        if not candidates:
+            skipped += 1
+            continue
+        chosen = min(candidates, key=lambda b: len(queues[b]))
+        queues[chosen].append(uid)
+    return {b: uids for b, uids in queues.items() if uids}, skipped
@@ -1,13 +1,14 @@
 from datetime import datetime, date, timedelta
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Dict
 
 from sqlalchemy import (
-    String, Integer, BigInteger, DateTime, Text, Boolean, ForeignKey, func, select
+    String, Integer, BigInteger, DateTime, Text, Boolean, ForeignKey, UniqueConstraint, func, select, insert, literal
 )
 from sqlalchemy.ext.asyncio import AsyncAttrs, create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import DeclarativeBase, mapped_column, Mapped, relationship
 
 from config import get_settings
+from render_cache import bump
 
 settings = get_settings()
 
@@ -23,6 +24,14 @@ class User(Base):
     tg_id: Mapped[int] = mapped_column(BigInteger, unique=True, index=True)
     joined_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
+class UserBot(Base):
+    # Foydalanuvchi qaysi botlarda /start bosgan (mirror botlar uchun)
+    __tablename__ = "user_bots"
+    __table_args__ = (UniqueConstraint("tg_id", "bot_id"),)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    tg_id: Mapped[int] = mapped_column(BigInteger, index=True)
+    bot_id: Mapped[int] = mapped_column(BigInteger)
+
 class Film(Base):
     __tablename__ = "films"
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
@@ -73,18 +82,43 @@ class Admin(Base):
     can_add_admin: Mapped[bool] = mapped_column(Boolean, default=False)
     can_admin_stat: Mapped[bool] = mapped_column(Boolean, default=False)
 
-async def init_db():
+async def init_db(main_bot_id: int):
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        # user_bots jadvalidan oldingi foydalanuvchilar asosiy botda /start bosgan
+        await conn.execute(
+            insert(UserBot).from_select(
+                ["tg_id", "bot_id"],
+                select(User.tg_id, literal(main_bot_id, BigInteger))
+                .where(~select(UserBot.id).where(UserBot.tg_id == User.tg_id).exists())
+            )
+        )
 
 # Users
-async def ensure_user(tg_id: int) -> None:
+async def ensure_user(tg_id: int, bot_id: int) -> None:
     async with SessionLocal() as s:
         exists = await s.scalar(select(User).where(User.tg_id == tg_id))
         if not exists:
             s.add(User(tg_id=tg_id))
+        linked = await s.scalar(select(UserBot).where(UserBot.tg_id == tg_id, UserBot.bot_id == bot_id))
+        if not linked:
+            s.add(UserBot(tg_id=tg_id, bot_id=bot_id))
+        if not exists or not linked:
             await s.commit()
 
+async def user_bot_map() -> Dict[int, List[int]]:
+    # {tg_id: [bot_id, ...]}; eski foydalanuvchilarda ro'yxat bo'sh bo'ladi
+    async with SessionLocal() as s:
+        rows = await s.execute(
+            select(User.tg_id, UserBot.bot_id).join(UserBot, UserBot.tg_id == User.tg_id, isouter=True)
+        )
+        result: Dict[int, List[int]] = {}
+        for tg_id, bot_id in rows.all():
+            ids = result.setdefault(tg_id, [])
+            if bot_id is not None:
+                ids.append(bot_id)
+        return result
+
 # Films
 async def add_film(code: str, title: str, description: str, video_file_id: Optional[str]) -> Tuple[bool, str]:
     async with SessionLocal() as s:
@@ -93,6 +127,7 @@ async def add_film(code: str, title: str, description: str, video_file_id: Optio
             return False, "Bu kod bilan film mavjud."
         s.add(Film(code=code, title=title, description=description, video_file_id=video_file_id))
         await s.commit()
+        bump("catalog")
         return True, "Film qo‘shildi."
 
 async def get_film_by_code(code: str) -> Optional[Film]:
@@ -109,6 +144,7 @@ async def add_part(code: str, name: str, description: str, video_file_id: str) -
             return False, "Bu nomdagi qism mavjud."
         s.add(FilmPart(film_id=film.id, name=name, description=description, video_file_id=video_file_id))
         await s.commit()
+        bump("catalog")
         return True, "Qism qo‘shildi."
 
 async def delete_film_or_part(code: str, part_name: Optional[str]) -> Tuple[bool, str]:
@@ -122,10 +158,12 @@ async def delete_film_or_part(code: str, part_name: Optional[str]) -> Tuple[bool
                 return False, "Qism topilmadi."
             await s.delete(part)
             await s.commit()
+            bump("catalog")
             return True, "Qism o‘chirildi."
         else:
             await s.delete(film)
             await s.commit()
+            bump("catalog")
             return True, "Film to‘liq o‘chirildi."
 
 async def list_parts(code: str) -> List[FilmPart]:
@@ -140,6 +178,7 @@ async def log_view(code: str, tg_id: int, part_name: Optional[str]) -> None:
     async with SessionLocal() as s:
         s.add(ViewLog(film_code=code, tg_id=tg_id, part_name=part_name))
         await s.commit()
+        bump("stats")
 
 async def top_films(limit: int = 20) -> List[Tuple[str, str, int]]:
     async with SessionLocal() as s:
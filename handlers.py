@@ -1,9 +1,10 @@
+import asyncio
 import logging
-from aiogram import Router, F, types
+from typing import Dict, List, Optional
+from aiogram import Bot, Router, F, types
 from aiogram.filters import CommandStart, Command
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.fsm.context import FSMContext
-from sqlalchemy import select
 from config import get_settings
 
 from keyboards import user_menu, admin_menu, parts_menu, pagination_menu, channels_inline
@@ -11,8 +12,10 @@ from db import (
     ensure_user, add_film, add_part, delete_film_or_part, get_film_by_code, list_parts,
     log_view, top_films, user_stats, list_films_paginated, films_count,
     add_channel, del_channel, list_channels, is_owner, get_admin,
-    add_admin_with_permissions, list_admins, SessionLocal, User
+    add_admin_with_permissions, list_admins, user_bot_map
 )
+from bots import spread, can_reach
+from render_cache import Rendered, get_or_render
 
 user_router = Router()
 admin_router = Router()
@@ -74,7 +77,7 @@ async def show_admin_menu(message: types.Message):
 # --- User Handlers ---
 @user_router.message(CommandStart())
 async def start(message: types.Message):
-    await ensure_user(message.from_user.id)
+    await ensure_user(message.from_user.id, message.bot.id)
     await message.answer("Xush kelibsiz! Kino bot foydalanuvchi menyusi.", reply_markup=user_menu())
 
 @user_router.message(F.text == "Adminga murojat")
@@ -82,15 +85,18 @@ async def contact_admin(message: types.Message):
     await message.answer("Adminga murojat uchun havola: https://t.me/kino_vibe_films_deb")
     await show_user_menu(message)
 
-@user_router.message(F.text == "Kinolar statistikasi")
-async def films_stat(message: types.Message):
+async def render_top_films() -> Rendered:
     data = await top_films(20)
     if not data:
-        await message.answer("Hozircha statistika yo‘q.")
-        return await show_user_menu(message)
+        return Rendered("Hozircha statistika yo‘q.")
     lines = [f"{idx}. {title} (kod: {code}) — {cnt} marta ko‘rilgan"
              for idx, (code, title, cnt) in enumerate(data, start=1)]
-    await message.answer("\n".join(lines))
+    return Rendered("\n".join(lines))
+
+@user_router.message(F.text == "Kinolar statistikasi")
+async def films_stat(message: types.Message):
+    view = await get_or_render("top_films", ("catalog", "stats"), render_top_films)
+    await message.answer(view.text)
     await show_user_menu(message)
 
 # --- Admin Handlers ---
@@ -178,26 +184,45 @@ async def channels_add_order(message: types.Message, state: FSMContext):
     await show_admin_menu(message)
 
 # Broadcast tugallanganda
-@admin_router.message(BroadcastState.waiting_content)
-async def all_write_do(message: types.Message, state: FSMContext):
+async def broadcast_batch(bot: Bot, message: types.Message, ids: List[int]) -> int:
+    # Har bir bot o'z navbatini eski bitta-bot sikli kabi ketma-ket yuboradi
     sent = 0
-    async with SessionLocal() as s:
-        users = await s.scalars(select(User.tg_id))
-        ids = list(users)
+    failed: Dict[str, int] = {}
     for uid in ids:
         try:
             if message.text:
-                await message.bot.send_message(uid, message.text)
+                await bot.send_message(uid, message.text)
             elif message.photo:
-                await message.bot.send_photo(uid, message.photo[-1].file_id, caption=message.caption or "")
+                await bot.send_photo(uid, message.photo[-1].file_id, caption=message.caption or "")
             elif message.video:
-                await message.bot.send_video(uid, message.video.file_id, caption=message.caption or "")
+                await bot.send_video(uid, message.video.file_id, caption=message.caption or "")
             elif message.document:
-                await message.bot.send_document(uid, message.document.file_id, caption=message.caption or "")
+                await bot.send_document(uid, message.document.file_id, caption=message.caption or "")
             sent += 1
         except Exception as e:
-            logging.warning(f"Broadcast to {uid} failed: {e}")
-    await message.answer(f"Yuborildi: {sent} foydalanuvchiga.")
+            # Xato turi ko'rinadi (masalan, TelegramRetryAfter - flood limit)
+            name = type(e).__name__
+            failed[name] = failed.get(name, 0) + 1
+            logging.warning(f"Broadcast to {uid} via bot {bot.id} failed: {name}: {e}")
+    logging.info(f"Broadcast via bot {bot.id}: sent {sent}/{len(ids)}, failed {failed or 0}")
+    return sent
+
+@admin_router.message(BroadcastState.waiting_content)
+async def all_write_do(message: types.Message, state: FSMContext):
+    targets = await user_bot_map()
+    if message.text:
+        # Matnni foydalanuvchi /start bosgan botlar orasida taqsimlaymiz
+        queues, skipped = spread(targets)
+    else:
+        # file_id faqat uni qabul qilgan botda ishlaydi, shu bot yeta oladiganlarga yuboramiz
+        ids = [uid for uid, bot_ids in targets.items() if can_reach(message.bot, bot_ids)]
+        queues = {message.bot: ids} if ids else {}
+        skipped = len(targets) - len(ids)
+    results = await asyncio.gather(*(broadcast_batch(b, message, ids) for b, ids in queues.items()))
+    text = f"Yuborildi: {sum(results)} foydalanuvchiga."
+    if skipped:
+        text += f"\nO‘tkazib yuborildi (bu bot(lar)da /start bosilmagan): {skipped}."
+    await message.answer(text)
     await state.clear()
     await show_admin_menu(message)
 
@@ -231,14 +256,14 @@ async def add_admin_do_add(message: types.Message, state: FSMContext):
     await show_admin_menu(message)
 
 # Film statistikasi tugallanganda
-async def send_film_page(message: types.Message, page: int):
+async def render_film_page(page: int) -> Optional[Rendered]:
     per_page = 30
     offset = page * per_page
     items = await list_films_paginated(offset, per_page)
     total = await films_count()
 
     if not items and page != 0:
-        return await message.answer("Bu sahifada ma’lumot yo‘q.", reply_markup=pagination_menu())
+        return None
 
     lines = []
     for i, film in enumerate(items, start=1 + offset):
@@ -246,7 +271,13 @@ async def send_film_page(message: types.Message, page: int):
 
     meta = f"Sahifa: {page+1} / {(total + per_page - 1)//per_page or 1}"
     text = f"{meta}\n\n" + ("\n".join(lines) if lines else "Ma’lumot yo‘q.")
-    await message.answer(text, reply_markup=pagination_menu())
+    return Rendered(text, pagination_menu())
+
+async def send_film_page(message: types.Message, page: int):
+    view = await get_or_render(("film_page", page), ("catalog",), lambda: render_film_page(page))
+    if view is None:
+        return await message.answer("Bu sahifada ma’lumot yo‘q.", reply_markup=pagination_menu())
+    await message.answer(view.text, reply_markup=view.reply_markup)
 
 
 @admin_router.message(FilmStatState.page, F.text.in_(["Keyingi", "Oldingi", "Asosiy bo‘lim", "Asosiy bo'lim"]))
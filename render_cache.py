@@ -0,0 +1,45 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+
+# Tayyor javoblar keshi: matn va reply_markup faqat ma'lumot o'zgarganda qayta quriladi.
+# "catalog" - filmlar/qismlar, "stats" - ko'rishlar statistikasi.
+_versions: Dict[str, int] = {"catalog": 0, "stats": 0}
+
+class Rendered(NamedTuple):
+    text: str
+    reply_markup: Optional[Any] = None
+
+# key -> (bog'liq turlar, versiyalar, javob)
+_cache: Dict[Hashable, Tuple[Tuple[str, ...], Tuple[int, ...], Rendered]] = {}
+
+def version(kinds: Tuple[str, ...]) -> Tuple[int, ...]:
+    return tuple(_versions[k] for k in kinds)
+
+def bump(kind: str) -> None:
+    # Ma'lumot o'zgarganda versiyani oshirib, unga bog'liq javoblarni o'chiramiz
+    _versions[kind] += 1
+    for key in [k for k, (kinds, _, _) in _cache.items() if kind in kinds]:
+        del _cache[key]
+
+def get(key: Hashable) -> Optional[Rendered]:
+    hit = _cache.get(key)
+    if hit is None:
+        return None
+    kinds, ver, rendered = hit
+    return rendered if ver == version(kinds) else None
+
+def put(key: Hashable, kinds: Tuple[str, ...], ver: Tuple[int, ...], rendered: Rendered) -> None:
+    # Qurish paytida ma'lumot o'zgargan bo'lsa, eskirgan javobni saqlamaymiz
+    if ver == version(kinds):
+        _cache[key] = (kinds, ver, rendered)
+
+async def get_or_render(key: Hashable, kinds: Tuple[str, ...],
+                        build: Callable[[], Awaitable[Optional[Rendered]]]) -> Optional[Rendered]:
+    rendered = get(key)
+    if rendered is not None:
+        return rendered
+    ver = version(kinds)
+    rendered = await build()
+    # build() None qaytarsa (masalan, mavjud bo'lmagan sahifa) - keshlanmaydi
+    if rendered is not None:
+        put(key, kinds, ver, rendered)
+    return rendered